@@ -1,33 +1,66 @@
 """
 Configuration class for dial plan provisioning
 """
-import json
 import logging
 import os
-from typing import Optional, Union
+from datetime import datetime
+from enum import Enum
+from functools import lru_cache
+from typing import Optional, Union, TYPE_CHECKING
 
 import yaml
 from dotenv import load_dotenv
 from pydantic import BaseModel
 from wxc_sdk.common import RouteType
-from wxc_sdk.integration import Integration
 from wxc_sdk.tokens import Tokens
 
+if TYPE_CHECKING:
+    from wxc_sdk.integration import Integration
+
 __all__ = ['DialplanConfig', 'Config']
 
 load_dotenv()
 
+# integration parameters: client id, client secret, scopes
+_INTEGRATION_ENV = (os.getenv('TOKEN_INTEGRATION_CLIENT_ID'),
+                    os.getenv('TOKEN_INTEGRATION_CLIENT_SECRET'),
+                    os.getenv('TOKEN_INTEGRATION_CLIENT_SCOPES'))
+
 log = logging.getLogger(__name__)
 
+# use libyaml based loader/dumper if available; fall back to pure Python implementation if PyYAML was built w/o libyaml
+_YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+_YamlDumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+
+def _yml_safe(value):
+    """
+    Prepare a value for the YML safe dumper: enums are replaced by their values and datetimes by their ISO
+    representation (same as in the JSON representation)
+    """
+    if isinstance(value, dict):
+        return {k: _yml_safe(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_yml_safe(v) for v in value]
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
 
-def build_integration() -> Integration:
+
+@lru_cache(maxsize=1)
+def build_integration() -> 'Integration':
     """
-    read integration parameters from environment variables and create an integration
+    create an integration based on the integration parameters read from environment variables at import time. The
+    integration is only created once and then cached
     :return: :class:`wxc_sdk.integration.Integration` instance
     """
-    client_id = os.getenv('TOKEN_INTEGRATION_CLIENT_ID')
-    client_secret = os.getenv('TOKEN_INTEGRATION_CLIENT_SECRET')
-    scopes = os.getenv('TOKEN_INTEGRATION_CLIENT_SCOPES')
+    # imported here as the integration (and the OAuth flow dependencies it pulls in) is only needed if we have to
+    # validate or obtain tokens
+    from wxc_sdk.integration import Integration
+
+    client_id, client_secret, scopes = _INTEGRATION_ENV
     redirect_url = 'http://localhost:6001/redirect'
     if not all((client_id, client_secret, scopes)):
         raise ValueError('failed to get integration parameters from environment')
@@ -75,7 +108,7 @@ class Config(BaseModel):
         :return: instance of Config class
         """
         with open(path, mode='r') as f:
-            config_dict = yaml.safe_load(f)
+            config_dict = yaml.load(f, Loader=_YamlLoader)
         config: Config = Config.parse_obj(config_dict)
         config.yml_path = path
         if isinstance(config.tokens, str):
@@ -88,9 +121,9 @@ class Config(BaseModel):
         """
         write config back to YML file
         """
-        data = json.loads(self.json())
+        data = _yml_safe(self.dict(exclude={'yml_path'}))
         with open(self.yml_path, mode='w') as f:
-            yaml.dump(data, f, default_flow_style=False)
+            yaml.dump(data, f, Dumper=_YamlDumper, default_flow_style=False)
 
     def assert_access_token(self):
         """
@@ -7,10 +7,10 @@ import logging
 import os
 import sys
 from collections import defaultdict
-from collections.abc import Iterable, Generator
-from csv import DictReader
+from collections.abc import Generator
+from csv import reader
 from dataclasses import dataclass
-from functools import reduce
+from itertools import chain
 
 from wxc_sdk.as_api import AsWebexSimpleApi
 from wxc_sdk.common import RouteType, PatternAction
@@ -41,17 +41,30 @@ def read_patterns(*, csv_file: str) -> dict[str, Catalog]:
     :return: Dictionary of patterns per catalog identifier
     """
     log.info(f'reading patterns from {csv_file}')
-    with open(csv_file, mode='r') as f:
-        reader = DictReader(f, fieldnames=['catalog', 'pattern'])
-        records = [r for r in reader]
-    # Now create a dictionary that has one
-    patterns_by_catalog = reduce(lambda pbc, record: pbc[record['catalog']].append(record['pattern']) or pbc,
-                                 records,
-                                 defaultdict(list))
+    # create a dictionary with the list of patterns per catalog; rows are consumed while reading the file
+    patterns_by_catalog = defaultdict(list)
+    with open(csv_file, mode='r', newline='') as f:
+        for row in reader(f):
+            if not row:
+                # skip empty lines
+                continue
+            catalog, pattern = row
+            patterns_by_catalog[catalog].append(pattern)
     return {name: Catalog(name=name, patterns=patterns)
             for name, patterns in patterns_by_catalog.items()}
 
 
+def batches(seq: list[str], batch_size: int) -> Generator[list[str], None, None]:
+    """
+    Yield batches of a list; the order of the list is preserved
+
+    :param seq: list to split into batches
+    :param batch_size:
+    """
+    for i in range(0, len(seq), batch_size):
+        yield seq[i:i + batch_size]
+
+
 async def configure_wxc(*, csv_file: str):
     """
     Configure dial plans and patterns. Patterns are read from the CSV file passed as argument. The mapping of
@@ -63,6 +76,20 @@ async def configure_wxc(*, csv_file: str):
     # read catalogs with their respective patterns from CSV file
     catalogs = read_patterns(csv_file=csv_file)
 
+    # validate catalog names referenced in the dial plan configurations once up front
+    known_catalogs = frozenset(catalogs)
+    valid_catalogs: dict[str, list[str]] = {}
+    for dialplan in config.dialplans:
+        for catalog_name in dialplan.catalogs:
+            if catalog_name not in known_catalogs:
+                log.error(f'{dialplan.name}: invalid catalog name "{catalog_name}" in dial plan')
+        valid_catalogs[dialplan.name] = [name for name in dialplan.catalogs if name in known_catalogs]
+
+    # set of unique patterns per dial plan: combined patterns of all catalogs configured for the dial plan
+    desired_patterns: dict[str, frozenset[str]] = {
+        dp_name: frozenset(chain.from_iterable(catalogs[name].patterns for name in catalog_names))
+        for dp_name, catalog_names in valid_catalogs.items()}
+
     # instantiate an API instance to be used
     async with AsWebexSimpleApi(tokens=config.tokens.access_token) as api:
 
@@ -83,6 +110,19 @@ async def configure_wxc(*, csv_file: str):
         # dict of dial plans by name
         dialplans: dict[str, DialPlan] = {dp.name: dp for dp in dp_list}
 
+        # sorted lists of patterns to add and to delete by dial plan name. Determined once and used in both rounds
+        pattern_diffs: dict[str, tuple[list[str], list[str]]] = {}
+
+        # get current patterns of all existing dial plans in parallel
+        existing = [dialplans[dialplan.name] for dialplan in config.dialplans
+                    if dialplan.name in dialplans]
+        existing_patterns = await asyncio.gather(*[prem_pstn.dial_plan.patterns(dial_plan_id=wxc_dp.dial_plan_id)
+                                                   for wxc_dp in existing])
+        for wxc_dp, curr_patterns in zip(existing, existing_patterns):
+            curr_patterns = set(curr_patterns)
+            patterns = desired_patterns[wxc_dp.name]
+            pattern_diffs[wxc_dp.name] = (sorted(patterns - curr_patterns), sorted(curr_patterns - patterns))
+
         async def configure_dialplan(dialplan: DialplanConfig,
                                      delete_only: bool):
             """
@@ -91,6 +131,10 @@ async def configure_wxc(*, csv_file: str):
             :param delete_only:
             :return:
             """
+            if delete_only and dialplan.name not in dialplans:
+                # nothing to delete from a dial plan which doesn't exist yet
+                return
+
             # check existence of trunk or route group
             route_id = None
             if dialplan.route_type == RouteType.trunk:
@@ -107,14 +151,14 @@ async def configure_wxc(*, csv_file: str):
                 return
 
             if (wxc_dialplan := dialplans.get(dialplan.name)) is None:
-                if delete_only:
-                    return
                 # dialplan needs to be created
                 response = await prem_pstn.dial_plan.create(name=dialplan.name,
                                                             route_id=route_id,
                                                             route_type=dialplan.route_type.value)
                 wxc_dialplan = await prem_pstn.dial_plan.details(dial_plan_id=response.dial_plan_id)
                 log.info(f'{dialplan.name}: created')
+                # a new dial plan doesn't have any patterns yet
+                pattern_diffs[dialplan.name] = (sorted(desired_patterns[dialplan.name]), [])
             elif not delete_only:
                 # check if the route choice has changed
                 if dialplan.route_type != wxc_dialplan.route_type or route_id != wxc_dialplan.route_id:
@@ -126,26 +170,11 @@ async def configure_wxc(*, csv_file: str):
                     log.info(f'{dialplan.name}: Updated route choice: '
                              f'{dialplan.route_choice}({dialplan.route_type.value})"')
 
-            # get combined list of patterns of all catalogs configured for this dialplan
-            patterns = []
-            for catalog_name in dialplan.catalogs:
-                if (catalog := catalogs.get(catalog_name)) is None:
-                    log.error(f'{dialplan.name}: invalid catalog name "{catalog_name}" in dial plan')
-                    continue
-                patterns.extend(catalog.patterns)
-
-            # make sure to only add unique patterns
-            patterns = list(set(patterns))
-            patterns.sort()
-
-            # get configured patterns
-            curr_patterns = set(await prem_pstn.dial_plan.patterns(dial_plan_id=wxc_dialplan.dial_plan_id))
-
-            to_add = set(patterns) - curr_patterns
-            to_delete = curr_patterns - set(patterns)
+            patterns = desired_patterns[dialplan.name]
+            to_add, to_delete = pattern_diffs[dialplan.name]
 
             # remove patterns not needed any more
-            async def modify_patterns(*, dp_id: str, action: PatternAction, patterns: Iterable[str]):
+            async def modify_patterns(*, dp_id: str, action: PatternAction, patterns: list[str]):
                 """
                 Modify patterns of current dial plan.
 
@@ -153,31 +182,21 @@ async def configure_wxc(*, csv_file: str):
 
                 :param dp_id: dial plan id
                 :param action: add or delete
-                :param patterns: patterns to be added or deleteed
+                :param patterns: sorted list of patterns to be added or deleteed
                 """
                 if not patterns:
                     # nothing to do
                     return
 
-                def batches(batch_size: int) -> Generator[str, None, None]:
-                    """
-                    Yield pattern batches
-
-                    :param batch_size:
-                    """
-                    pattern_list = list(patterns)
-                    pattern_list.sort()
-                    for i in range(0, len(pattern_list), batch_size):
-                        yield pattern_list[i:i + batch_size]
-                    return
-
                 # schedule/run dial plan pattern updates in batches of 200
+                # patterns and action are known to be valid: no need for pydantic validation
                 await asyncio.gather(*[prem_pstn.dial_plan.modify_patterns(dial_plan_id=dp_id,
                                                                            dial_patterns=[
-                                                                               PatternAndAction(dial_pattern=pattern,
-                                                                                                action=action)
+                                                                               PatternAndAction.construct(
+                                                                                   dial_pattern=pattern,
+                                                                                   action=action)
                                                                                for pattern in batch])
-                                       for batch in batches(200)])
+                                       for batch in batches(patterns, 200)])
                 return
 
             if delete_only:
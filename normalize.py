@@ -3,34 +3,64 @@
 Read a bunch of patterns from a CSV file (GDPR export) and normalize them to a format that can be consumed by
 WxC dial plans
 """
+import csv
 import logging
 import os.path
-import re
 import sys
 from collections import defaultdict
-from csv import DictReader
-from itertools import groupby
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import chain
 from typing import Iterable, Generator
 
+# characters not supported in WxC dial patterns
+_BAD_CHARS = frozenset('.*!')
+
+
+@lru_cache()
+def expand_class(body: str) -> tuple[str, ...]:
+    """
+    Determine the digits matched by a character class like [0-35-7] or [^5]
+
+    :param body: body of the character class w/o the enclosing brackets
+    :return: digits matched by the character class in ascending order
+    """
+    negate = body.startswith('^')
+    if negate:
+        body = body[1:]
+    if ']' in body[1:]:
+        # class closed before the end of the body (a leading ']' is a literal): not a single digit class
+        return ()
+    chars = set()
+    i = 0
+    while i < len(body):
+        if i + 2 < len(body) and body[i + 1] == '-':
+            # range like 0-3
+            chars.update(chr(c) for c in range(ord(body[i]), ord(body[i + 2]) + 1))
+            i += 3
+        else:
+            chars.add(body[i])
+            i += 1
+    return tuple(d for d in '0123456789'
+                 if (d in chars) != negate)
+
 
 def normalize(*, patterns: Iterable[str]) -> Generator[str, None, None]:
-    # regex to catch patterns with [..] in it
-    catch_re = re.compile(r'(?P<pre>.*)(?P<re_part>\[.+])(?P<post>.*)')
     for pattern in patterns:
-        if any(c in pattern for c in '.*!'):
+        if not _BAD_CHARS.isdisjoint(pattern):
             print(f'illegal pattern format: {pattern}', file=sys.stderr)
             continue
-        if m := catch_re.match(pattern):
-            # get pre, regex, post
-            pre = m.group('pre')
-            re_part = m.group('re_part')
-            post = m.group('post')
-            # determine digits matched by the reqex in the pattern and yield normalized patterns
-            digit_matcher = re.compile(re_part)
-            matching_digits = (d for d in '0123456789'
-                               if digit_matcher.match(d))
+        # catch patterns with [..] in it: last ']' and the last '[' before it with a non-empty class in between
+        end = pattern.rfind(']')
+        start = pattern.rfind('[', 0, end - 1) if end > 1 else -1
+        if start >= 0:
+            # get pre, character class, post
+            pre = pattern[:start]
+            body = pattern[start + 1:end]
+            post = pattern[end + 1:]
+            # determine digits matched by the character class in the pattern and yield normalized patterns
             logging.debug(f'expanding "{pattern}"')
-            for d in matching_digits:
+            for d in expand_class(body):
                 expanded = f'{pre}{d}{post}'
                 logging.debug(f' {expanded}')
                 yield expanded
@@ -39,21 +69,47 @@ def normalize(*, patterns: Iterable[str]) -> Generator[str, None, None]:
             yield pattern
 
 
+def normalize_catalog(patterns: Iterable[str]) -> dict[str, tuple[str, ...]]:
+    """
+    Normalize all patterns of a catalog
+
+    :param patterns: patterns of the catalog
+    :return: normalized patterns by pattern
+    """
+    return {pattern: tuple(normalize(patterns=[pattern])) for pattern in patterns}
+
+
 def read_and_normalize(csv_name: str):
-    with open(csv_name, mode='r', encoding='utf-8-sig') as csv_file:
-        reader = DictReader(csv_file, dialect='excel')
-        records = list(reader)
     # group patterns by remote catalog
-    records.sort(key=lambda r: r['remotecatalogkey_id'])
-    grouped = {catalog: set(r['pattern'] for r in riter)
-               for catalog, riter in groupby(records, key=lambda r: r['remotecatalogkey_id'])}
-    grouped: dict[str, set[str]]
+    grouped: dict[str, set[str]] = {}
+    with open(csv_name, mode='r', encoding='utf-8-sig') as csv_file:
+        reader = csv.reader(csv_file, dialect='excel')
+        header = next(reader)
+        catalog_index = header.index('remotecatalogkey_id')
+        pattern_index = header.index('pattern')
+        for row in reader:
+            if not row:
+                continue
+            grouped.setdefault(row[catalog_index], set()).add(row[pattern_index])
+    # catalogs are processed in order of the catalog keys
+    grouped = dict(sorted(grouped.items()))
+
+    # normalize each pattern only once; the results are reused for conflict detection, conflict resolution and output
+    # catalogs are independent and are normalized in parallel
+    normalized_map: dict[str, tuple[str, ...]] = {}
+    if len(grouped) > 1:
+        with ProcessPoolExecutor() as pool:
+            for catalog_map in pool.map(normalize_catalog, grouped.values()):
+                normalized_map.update(catalog_map)
+    else:
+        for patterns in grouped.values():
+            normalized_map.update(normalize_catalog(patterns))
 
     # some patterns might be conflicting
     normalized_by_source = defaultdict(list)
     for catalog in grouped:
         for pattern in grouped[catalog]:
-            for normalized in normalize(patterns=[pattern]):
+            for normalized in normalized_map[pattern]:
                 normalized_by_source[normalized].append((catalog, pattern))
     # duplicates are normalized patterns resulting from normalization of more than one pattern
     duplicates = {n: l for n, l in normalized_by_source.items()
@@ -65,20 +121,32 @@ def read_and_normalize(csv_name: str):
         origin_patterns = [o for _, o in duplicates[duplicate]]
 
         # normalization results per origin
-        normalized_from_origin = {o: set(normalize(patterns=[o])) for o in origin_patterns}
+        normalized_from_origin = {o: set(normalized_map[o]) for o in origin_patterns}
         normalized_from_origin: dict[str, set[str]]
 
         # sort origin_patterns so that we have the most specific 1st
         origin_patterns.sort(key=lambda o: len(normalized_from_origin[o]))
 
         # now remove more specific patterns from least specific ones
-        # need to iterate by index as we are updating members
-        for i in range(len(origin_patterns) - 1):
-            more_specific = normalized_from_origin[origin_patterns[i]]
-            # remove these from all less specific origins
-            for l in range(i + 1, len(origin_patterns)):
-                less_specific = normalized_from_origin[origin_patterns[l]]
-                less_specific.difference_update(more_specific)
+        # as origins are sorted with the most specific 1st, a single sweep is enough: the running union of all previous
+        # (already reduced) origins contains exactly the patterns owned by more specific origins.
+        # An origin showing up again in another catalog is ambiguous and doesn't keep any patterns. Until that next
+        # occurrence the patterns it owns are still removed from less specific origins.
+        seen = set()
+        pending: dict[str, frozenset[str]] = {}
+        last_index = {o: i for i, o in enumerate(origin_patterns)}
+        for i, origin in enumerate(origin_patterns):
+            reduced = normalized_from_origin[origin]
+            if pending.pop(origin, None) is not None:
+                reduced.clear()
+                continue
+            reduced.difference_update(seen)
+            for owned in pending.values():
+                reduced.difference_update(owned)
+            if last_index[origin] > i:
+                pending[origin] = frozenset(reduced)
+            else:
+                seen |= reduced
 
         # now remove the original patterns from catalog and insert new ones
         print(f'Conflict resolution: {", ".join(origin_patterns)}', file=sys.stderr)
@@ -93,10 +161,13 @@ def read_and_normalize(csv_name: str):
     results = {}
     # normalize patterns for each remote catalog
     for catalog, patterns in grouped.items():
-        normalized_patterns = list(normalize(patterns=patterns))
+        # patterns inserted during conflict resolution have not been normalized yet
+        normalized_patterns = list(chain.from_iterable(normalized_map[pattern] if pattern in normalized_map
+                                                       else normalize(patterns=[pattern])
+                                                       for pattern in patterns))
         normalized_patterns.sort()
         # print normalized patterns
-        print('\n'.join(f'{catalog},{pattern}' for pattern in normalized_patterns))
+        sys.stdout.writelines(f'{catalog},{pattern}\n' for pattern in normalized_patterns)
         results[catalog] = (len(patterns), len(normalized_patterns))
     # print a summary
     before_total, after_total = 0, 0
@@ -5,6 +5,8 @@ Read learned patterns from remoteroutingpattern table and write to CSV for furth
 import csv
 import logging
 import os
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field, parse_obj_as
@@ -12,16 +14,11 @@ from pydantic import BaseModel, Field, parse_obj_as
 from ucmaxl import AXLHelper
 
 
-class LearnedPattern(BaseModel):
-    remote_catalog_key_id: str = Field(alias='remotecatalogkey_id')
-    pattern: str
-
-
-def learned_patterns(axl: AXLHelper, with_numbers: bool = False) -> list[LearnedPattern]:
+def learned_patterns(axl: AXLHelper, with_numbers: bool = False) -> Iterator[dict]:
     """
     read learned patterns from remoteroutingpattern table
     :param axl:
-    :return: list of learned patterns
+    :return: learned patterns; dicts with keys remotecatalogkey_id and pattern
     """
     """
     tk pattern usage:
@@ -39,9 +36,8 @@ def learned_patterns(axl: AXLHelper, with_numbers: bool = False) -> list[Learned
     if with_numbers:
         usage.extend((23, 24, 25))
     usage = f'({",".join(str(u) for u in usage)})'
-    patterns = axl.sql_query(
+    return axl.sql_query_stream(
         f'select remotecatalogkey_id,pattern from remoteroutingpattern where tkpatternusage in {usage}')
-    return parse_obj_as(list[LearnedPattern], patterns)
 
 
 class RemoteCatalog(BaseModel):
@@ -67,27 +63,31 @@ def read_from_ucm():
     print('Reading from UCM...')
     axl = AXLHelper(ucm_host=axl_host, auth=(axl_user, axl_password), verify=False)
 
-    remote_catalogs = parse_obj_as(list[RemoteCatalog],
-                                   axl.sql_query('select peerid,routestring from remoteclusteruricatalog'))
-    rc_by_peer_id: dict[str, RemoteCatalog] = {rc.peer_id: rc for rc in remote_catalogs}
+    # the queries are independent and are executed concurrently
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        remote_catalogs_future = pool.submit(axl.sql_query, 'select peerid,routestring from remoteclusteruricatalog')
+        rc_keys_future = pool.submit(axl.sql_query,
+                                     'select remotecatalogkey_id,remoteclusteruricatalog_peerid from remotecatalogkey')
+        # read learned patterns
+        learned_future = pool.submit(learned_patterns, axl)
 
-    rc_keys = parse_obj_as(
-        list[RcKey],
-        axl.sql_query('select remotecatalogkey_id,remoteclusteruricatalog_peerid from remotecatalogkey'))
+        remote_catalogs = parse_obj_as(list[RemoteCatalog], remote_catalogs_future.result())
+        rc_keys = parse_obj_as(list[RcKey], rc_keys_future.result())
+        learned = learned_future.result()
+
+    rc_by_peer_id: dict[str, RemoteCatalog] = {rc.peer_id: rc for rc in remote_catalogs}
     route_string_by_catalog_key: dict[str, str] = {rc.rc_key_id: rc_by_peer_id[rc.rc_catalog_peer_id].route_string
                                                    for rc in rc_keys}
 
-    # read learned patterns
-    learned = learned_patterns(axl)
-
     # write patterns to file with route string in remotecatalogkey_id column
     csv_path = f'{os.path.splitext(os.path.basename(__file__))[0]}.csv'
     print(f'Writing patterns to "{csv_path}"')
-    with open(csv_path, mode='w', newline='') as output:
+    with open(csv_path, mode='w', newline='', buffering=1 << 20) as output:
         writer = csv.writer(output)
         writer.writerow(('remotecatalogkey_id', 'pattern'))
-        for pattern in learned:
-            writer.writerow((route_string_by_catalog_key[pattern.remote_catalog_key_id], pattern.pattern))
+        # writerows() consumes the generator in C; rows are parsed from the streamed AXL reply one at a time
+        writer.writerows((route_string_by_catalog_key[row['remotecatalogkey_id']], row['pattern'])
+                         for row in learned)
 
 
 if __name__ == '__main__':
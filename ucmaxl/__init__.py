@@ -6,10 +6,14 @@ import os
 import re
 import tempfile
 import zipfile
+from collections.abc import Iterator
+from xml.sax.saxutils import escape, unescape
 
 import requests
 import urllib3
 import zeep
+from lxml import etree
+from requests.adapters import HTTPAdapter
 from zeep.plugins import HistoryPlugin
 
 log = logging.getLogger(__name__)
@@ -25,14 +29,17 @@ class AXLHelper:
         :param auth: passed to requests.Session object. For basic authentication simply pass a (user/password) tuple
         :param version: String of WSDL version to use. For example: '12.0'
         :param verify: set to False to disable SSL key validation
-        :param timeout: zeep timeout
+        :param timeout: timeout for AXL requests (zeep and SQL queries)
         """
         self.ucm_host = ucm_host
+        self.timeout = timeout
         if ':' not in ucm_host:
             ucm_host += ':8443'
         self.axl_url = f'https://{ucm_host}/axl/'
 
         self.session = requests.Session()
+        # keep-alive connection pool for AXL requests
+        self.session.mount('https://', HTTPAdapter(pool_connections=10, pool_maxsize=20))
         self.session.auth = auth
         if verify is not None:
             self.session.verify = verify
@@ -40,6 +47,7 @@ class AXLHelper:
                 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
         version = version or self._get_version()
+        self.version = version
 
         wsdl_version = version
 
@@ -125,9 +133,60 @@ class AXLHelper:
         :param query: SQL query
         :return: list of dict; each dict representing one record
         """
-        r = self.service.executeSQLQuery(sql=query)
+        return list(self.sql_query_stream(query))
 
-        if r['return'] is None:
-            return []
+    def sql_query_stream(self, query) -> Iterator[dict]:
+        """
+        execute an SQL query; the query is executed immediately while the records are read and parsed from the reply
+        on demand
+        :param query: SQL query
+        :return: iterator of dicts; each dict representing one record
+        """
+        # SOAP request is sent w/o zeep and the reply is streamed and parsed row by row; avoids zeep's deserialization
+        # overhead for large results
+        soap_envelope = (f'<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/" '
+                         f'xmlns:ns="http://www.cisco.com/AXL/API/{self.version}"><soapenv:Header/>'
+                         f'<soapenv:Body><ns:executeSQLQuery><sql>{escape(query)}</sql></ns:executeSQLQuery>'
+                         f'</soapenv:Body></soapenv:Envelope>')
+        headers = {'Content-Type': 'text/xml',
+                   'SOAPAction': f'CUCM:DB ver={self.version} executeSQLQuery'}
+        r = self.session.post(self.axl_url, data=soap_envelope, headers=headers, timeout=self.timeout, stream=True)
+        if not r.ok:
+            # AXL reports errors (like "Query request too large") as SOAP fault
+            fault = self._fault_message(r.text)
+            log.error(f'sql_query_stream: {r.status_code} {r.reason}: {fault}')
+            raise requests.HTTPError(f'{r.status_code} {r.reason}: {fault}', response=r)
+        # let urllib3 take care of content encoding
+        r.raw.decode_content = True
+        return self._rows(r)
+
+    @staticmethod
+    def _fault_message(text: str) -> str:
+        """
+        get error message from SOAP fault in an AXL reply
+        :param text: SOAP reply
+        :return: AXL message or fault string
+        """
+        for tag in ('axlmessage', 'faultstring'):
+            if m := re.search(f'<{tag}>(.*?)</{tag}>', text, flags=re.DOTALL):
+                return unescape(m.group(1))
+        return text
 
-        return [{t.tag: t.text for t in row} for row in r['return']['row']]
+    @staticmethod
+    def _rows(r: requests.Response) -> Iterator[dict]:
+        """
+        parse records from streamed executeSQLQuery reply
+        :param r: streamed SOAP reply
+        :return: dicts; each dict representing one record
+        """
+        try:
+            # same hardening as zeep: no entity expansion, no DTD and no network access
+            for _, row in etree.iterparse(r.raw, tag='row', resolve_entities=False, no_network=True,
+                                          load_dtd=False):
+                yield {t.tag: t.text for t in row}
+                # free memory of rows already processed
+                row.clear()
+                while row.getprevious() is not None:
+                    del row.getparent()[0]
+        finally:
+            r.close()